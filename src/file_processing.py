@@ -0,0 +1,155 @@
+import os
+import time
+from ollama_client import OllamaTimeout
+from run_control import RunCancelled, file_timeout
+from profiling import span
+from output_store import hash_source
+
+# Same value as tkinter.END. The helpers below only need it to append to the
+# text box they are given, so this module does not have to import tkinter and
+# can be used by headless workers such as the shard coordinator.
+END = "end"
+
+def find_source_files(folder_path, recursive=False):
+    """
+    Returns the .cs files to check, as paths relative to the given folder.
+
+    :param folder_path: The folder to search for C# files.
+    :param recursive: Whether to also search the subfolders of the folder.
+    :return: A sorted list of relative file paths.
+    """
+    if not recursive:
+        return sorted(f for f in os.listdir(folder_path) if f.endswith('.cs'))
+
+    # Walk the whole tree and keep the paths relative to the folder, so the
+    # results can be written next to (or keyed by) the original files.
+    cs_files = []
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            if file.endswith('.cs'):
+                cs_files.append(os.path.relpath(os.path.join(root, file), folder_path))
+    return sorted(cs_files)
+
+def read_style_guide(gui_callback, text_box):
+    """
+    Reads the C# style guide from the predefined location.
+
+    :param gui_callback: A function to safely update the GUI from a different thread.
+    :param text_box: The GUI text box widget where messages and errors will be displayed.
+    :return: The contents of the style guide file as a string, or None if an error occurs.
+    """
+    
+    # Construct the path to the style guide file by combining the directory of this script
+    # with the relative path to the style guide file. This ensures that the path is correct
+    # regardless of the environment in which the script is run.
+    style_guide_path = os.path.normpath(
+        os.path.join(os.path.dirname(__file__), '..', 'style_guides', 'google_csharp_style_guide.txt')
+    )
+
+    try:
+        # Attempt to open the style guide file in read mode.
+        with open(style_guide_path, 'r') as sg_file:
+            # Read the entire contents of the file and return it as a string.
+            return sg_file.read()
+    except Exception as e:
+        # If an error occurs while opening or reading the file, update the GUI text box
+        # with the error message. The gui_callback function ensures that this update is
+        # performed safely from the GUI thread, avoiding any concurrency issues.
+        message = f"Error reading style guide: {e}\n"
+        gui_callback(lambda: text_box.insert(END, message))
+        
+        # Return None to indicate that an error occurred and the style guide could not be read.
+        return None
+
+def process_file(file, folder_path, style_guide, ollama, model_var, text_box, _threadsafe_gui, store=None, control=None):
+    """
+    This function is responsible for processing a single source code file using the selected Ollama model and the given style guide.
+    It takes the following parameters:
+        - file: The relative path to the source code file to process.
+        - folder_path: The absolute path to the folder containing the source code file.
+        - style_guide: The contents of the style guide file as a string.
+        - ollama: An OllamaClient object which is used to send requests to the Ollama server.
+        - model_var: A Tkinter StringVar object which contains the name of the currently selected Ollama model.
+        - text_box: The GUI text box widget where messages and errors will be displayed.
+        - _threadsafe_gui: A function to safely update the GUI from a different thread.
+        - store: An optional RunOutputStore. When given, the prompt and response are recorded in it instead of sidecar files.
+        - control: An optional RunControl. Cancelling it aborts the request for this file.
+
+    The function builds a prompt from the style guide and the source code and sends it to the Ollama server using the selected model.
+    Without a store, the prompt is written to a .cs_prompt file and the response to a .cs_mod file in the same directory as the
+    source code file. With a store, both are recorded in the run database instead (with a hash of the source code) and no files
+    are written next to the source.
+
+    Returns True if a response was received and written, False otherwise.
+    """
+
+    file_path = os.path.normpath(os.path.join(folder_path, file))
+    selected_model = model_var.get()
+    _threadsafe_gui(lambda: text_box.insert(END, f"Processing {file} with model '{selected_model}'...\n"))
+
+    try:
+        # Read the source code file
+        with span("read") as trace_args:
+            with open(file_path, 'r', encoding='utf-8') as cf:
+                code = cf.read()
+            trace_args["chars"] = len(code)
+
+        # Construct the prompt to send to the Ollama server
+        with span("prompt"):
+            prompt = (
+                f"Check and rewrite the following C# code according to this style guide.\n"
+                f"Style Guide:\n{style_guide}\n\n"
+                f"Code:\n{code}\n\n"
+                f"Return only the corrected code."
+            )
+
+        # Write the prompt to a .prompt file (the run database stores it with the response)
+        if store is None:
+            with span("write_prompt"):
+                timestamp = time.strftime("%Y%m%d_%H%M%S")
+                prompt_file = os.path.normpath(os.path.join(folder_path, f"{os.path.splitext(file)[0]}_{timestamp}.cs_prompt"))
+                _threadsafe_gui(lambda: text_box.insert(END, f"\n Creating Prompt file: {prompt_file} \n"))
+                with open(prompt_file, 'w', encoding='utf-8') as pf:
+                    pf.write(prompt)
+
+        # Send the prompt to the Ollama server and get the response. Larger files
+        # take longer to rewrite, so the deadline scales with the file size.
+        timeout = file_timeout(os.path.getsize(file_path))
+        start_time = time.time()
+        response = ollama.send_request(prompt, model=selected_model, timeout=timeout, control=control)
+        elapsed = time.time() - start_time
+
+        if response and store is not None:
+            # Record the prompt and response in the run database
+            with span("write"):
+                store.add_result(file, selected_model, prompt, response, elapsed, hash_source(code))
+
+            _threadsafe_gui(lambda: text_box.insert(END, f"Processed {file} -> {store.db_path} (in {elapsed:.2f}s)\n"))
+            return True
+        elif response:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            mod_file = os.path.normpath(os.path.join(folder_path, f"{os.path.splitext(file)[0]}_{timestamp}.cs_mod"))
+
+            # Write the response from the Ollama server to a .cs_mod file
+            with span("write"):
+                with open(mod_file, 'w', encoding='utf-8') as mf:
+                    mf.write(response)
+
+            _threadsafe_gui(lambda: text_box.insert(END, f"Processed {file} -> {mod_file} (in {elapsed:.2f}s)\n"))
+            return True
+        else:
+            _threadsafe_gui(lambda: text_box.insert(END, f"No response from model for {file}.\n"))
+
+    except RunCancelled:
+        _threadsafe_gui(lambda: text_box.insert(END, f"Cancelled {file}.\n"))
+
+    except OllamaTimeout as e:
+        # Format the message now, as the exception is cleared once this block ends
+        message = f"Timed out processing {file}: {e}\n"
+        _threadsafe_gui(lambda: text_box.insert(END, message))
+
+    except Exception as e:
+        message = f"Error processing {file}: {e}\n"
+        _threadsafe_gui(lambda: text_box.insert(END, message))
+
+    return False
@@ -2,6 +2,7 @@ from tkinter import Tk, filedialog, messagebox, END, Button
 from gui_layout import setup_gui
 from style_checker_logic import scan_files, check_style
 from gui_utils import threadsafe_gui
+from output_store import OUTPUT_MODE_SIDECAR, OUTPUT_MODE_STORE
 import os
 import requests
 import datetime
@@ -24,6 +25,7 @@ class StyleCheckerApp:
         self.folder_path = ''  # Stores the path to the folder containing C# files to check
         self.last_llm_response = None  # Stores the last response from the LLM
         self.last_llm_model = None  # Stores the name of the last LLM model used
+        self.run_control = None  # Controls (cancel/pause/resume) the style check in progress
 
         # Stores a mapping of language names to their corresponding file extensions
         self.language_extensions = {
@@ -35,6 +37,12 @@ class StyleCheckerApp:
             "JavaScript": "js"
         }
 
+        # Stores a mapping of output dropdown labels to the output modes used by check_style
+        self.output_modes = {
+            "Run Database": OUTPUT_MODE_STORE,
+            "Sidecar Files": OUTPUT_MODE_SIDECAR
+        }
+
         # Sets up the GUI layout
         setup_gui(master, self)
 
@@ -80,6 +88,19 @@ class StyleCheckerApp:
             self.folder_entry.delete(0, END)
             self.folder_entry.insert(0, self.folder_path)
 
+    def select_output_folder(self):
+        """
+        Opens a file dialog to select the folder where run databases are written.
+
+        :return: None
+        """
+        output_folder = filedialog.askdirectory()
+
+        # Replace the current results folder with the selected one
+        if output_folder:
+            self.output_folder_entry.delete(0, END)
+            self.output_folder_entry.insert(0, os.path.normpath(output_folder))
+
     def scan_files(self):
         # Retrieve the folder path from the input field
         # This is the path that the user has selected as the root directory
@@ -150,7 +171,70 @@ class StyleCheckerApp:
 
     def check_style(self):
         # Removed the line that clears the output text box
-        check_style(self.folder_entry.get().strip(), self.model_var, self.text_box, lambda func: threadsafe_gui(self.master, func))
+        # Only one run at a time; cancel the previous one before starting another
+        if self.run_is_active():
+            self.run_control.cancel()
+
+        output_mode = self.output_modes.get(self.output_mode_var.get(), OUTPUT_MODE_SIDECAR)
+        self.run_control = check_style(self.folder_entry.get().strip(), self.model_var, self.text_box, lambda func: threadsafe_gui(self.master, func), output_mode, self.profile_var.get(), self.output_folder_entry.get().strip() or None)
+        self.pause_button.config(text="Pause")
+        self.watch_run(self.run_control)
+
+    def run_is_active(self):
+        """
+        Returns True if a style check is in progress and has not been cancelled.
+        """
+        return (
+            self.run_control is not None
+            and not self.run_control.cancelled
+            and not self.run_control.finished
+        )
+
+    def watch_run(self, control):
+        """
+        Polls the given run until it finishes, then resets the Pause button,
+        e.g. when the run was paused while its last file was being processed.
+        """
+        # Stop watching once a newer run has replaced this one
+        if control is not self.run_control:
+            return
+
+        if control.finished:
+            self.pause_button.config(text="Pause")
+        else:
+            self.master.after(500, self.watch_run, control)
+
+    def toggle_pause(self):
+        """
+        Pauses the style check in progress, or resumes it if it is already paused.
+
+        A paused run finishes the file it is working on and then waits before
+        starting the next one.
+        """
+        if not self.run_is_active():
+            return
+
+        if self.run_control.paused:
+            self.run_control.resume()
+            self.pause_button.config(text="Pause")
+            self.text_box.insert(END, "\nRun resumed.\n")
+        else:
+            self.run_control.pause()
+            self.pause_button.config(text="Resume")
+            self.text_box.insert(END, "\nRun paused after the current file.\n")
+        self.text_box.see(END)
+
+    def cancel_check(self):
+        """
+        Cancels the style check in progress, aborting the request that is in flight.
+        """
+        if not self.run_is_active():
+            return
+
+        self.run_control.cancel()
+        self.pause_button.config(text="Pause")
+        self.text_box.insert(END, "\nCancelling run...\n")
+        self.text_box.see(END)
 
     def update_model_list(self):
         """
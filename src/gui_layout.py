@@ -1,4 +1,5 @@
-from tkinter import Tk, Button, Label, filedialog, messagebox, Text, Scrollbar, END, Entry, StringVar, OptionMenu, Frame
+from tkinter import Tk, Button, Label, filedialog, messagebox, Text, Scrollbar, END, Entry, StringVar, OptionMenu, Frame, BooleanVar, Checkbutton
+from output_store import DEFAULT_RUN_OUTPUT_DIR
 
 def setup_gui(master, app):
     """
@@ -32,11 +33,26 @@ def setup_gui(master, app):
     app.folder_entry.pack(side='left', padx=5)
     Button(folder_frame, text="Browse", command=app.select_folder, font=consolas_font).pack(side='left')
 
+    # Folder where run databases are written, kept outside the folder being scanned
+    output_folder_frame = Frame(master)
+    output_folder_frame.pack(fill='x')
+
+    Label(output_folder_frame, text="Results Folder:", font=consolas_font).pack(side='left')
+    app.output_folder_entry = Entry(output_folder_frame, width=50, font=consolas_font)
+    app.output_folder_entry.insert(0, DEFAULT_RUN_OUTPUT_DIR)
+    app.output_folder_entry.pack(side='left', padx=5)
+    Button(output_folder_frame, text="Browse", command=app.select_output_folder, font=consolas_font).pack(side='left')
+
     # Buttons on a new line
     button_frame = Frame(master)
     button_frame.pack(fill='x')
     Button(button_frame, text="Scan Files", command=app.scan_files, font=consolas_font).pack(side='left', padx=10)
     Button(button_frame, text="Check Style", command=app.check_style, font=consolas_font).pack(side='left', padx=10)
+    app.pause_button = Button(button_frame, text="Pause", command=app.toggle_pause, font=consolas_font)
+    app.pause_button.pack(side='left', padx=10)
+    Button(button_frame, text="Cancel", command=app.cancel_check, font=consolas_font).pack(side='left', padx=10)
+    app.profile_var = BooleanVar(master, value=False)
+    Checkbutton(button_frame, text="Profile Run", variable=app.profile_var, font=consolas_font).pack(side='left', padx=10)
     Button(button_frame, text="Update Ollama Model", command=app.update_model_list, font=consolas_font).pack(side='left', padx=10)
 
     # LLM model dropdown with label
@@ -57,6 +73,14 @@ def setup_gui(master, app):
     app.language_dropdown.config(font=consolas_font)
     app.language_dropdown.pack(side='left')
 
+    # Output mode dropdown: per-file sidecar files or a single run database
+    Label(model_frame, text="Output:", font=consolas_font).pack(side='left', padx=10)
+    app.output_mode_var = StringVar(master)
+    app.output_mode_var.set("Run Database")
+    app.output_mode_dropdown = OptionMenu(model_frame, app.output_mode_var, "Run Database", "Sidecar Files")
+    app.output_mode_dropdown.config(font=consolas_font)
+    app.output_mode_dropdown.pack(side='left')
+
     # LLM status on the same line
     status_frame = Frame(master)
     status_frame.pack(fill='x')
@@ -1,16 +1,34 @@
+import socket
 import requests
 import json
+import time
+import threading
+from run_control import RunCancelled
+from profiling import span
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Seconds allowed for opening the connection to the Ollama server.
+CONNECT_TIMEOUT = 10
+
+
+class OllamaTimeout(Exception):
+    """Raised when a generation does not finish before its deadline."""
+
 
 class OllamaClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None):
         # Local Ollama API endpoint. This is the URL that the Ollama
         # API is listening on. The Ollama API is a local service that
         # runs on the user's machine, and it is responsible for
         # generating code based on human instructions. The API is
-        # accessed via HTTP requests to the above URL.
-        self.base_url = "http://localhost:11434/api"
+        # accessed via HTTP requests to the above URL. A different
+        # endpoint can be passed in, e.g. when sharding a run across
+        # several Ollama servers.
+        self.base_url = (base_url or "http://localhost:11434/api").rstrip("/")
 
-    def send_request(self, prompt, model):
+    def send_request(self, prompt, model, timeout=120, control=None):
         """
         Send a request to the Ollama API to generate code based on a human instruction
         and a code model.
@@ -18,13 +36,22 @@ class OllamaClient:
         Args:
             prompt (str): A human instruction that describes the code to be generated.
             model (str): The name of the code model to use to generate the code.
+            timeout (float): The deadline in seconds for the whole generation, including
+                waiting for the response to start and streaming it.
+            control (RunControl): Optional run control. When the run is cancelled the
+                request is aborted, even before the response has started, and
+                RunCancelled is raised.
 
         Returns:
             str: The generated code as a string.
+
+        Raises:
+            RunCancelled: If the run was cancelled while the request was in flight.
+            OllamaTimeout: If the generation did not finish within the timeout.
         """
 
         # The URL of the Ollama API endpoint.
-        url = "http://localhost:11434/api/generate"
+        url = f"{self.base_url}/generate"
 
         # The data to send in the request body.
         payload = {
@@ -33,29 +60,168 @@ class OllamaClient:
             "stream": True
         }
 
+        # Set when the deadline timer below has aborted the request.
+        timed_out = threading.Event()
+
+        # Every request gets its own session and adapter, so aborting it cannot
+        # affect any other request. The deadline timer and the cancel hook are
+        # armed before the request is sent: Ollama sends no headers while it is
+        # queueing the request or loading the model, and the request has to be
+        # abortable during that time too.
+        adapter = _AbortableAdapter()
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        def on_deadline():
+            timed_out.set()
+            adapter.abort()
+
+        deadline = threading.Timer(timeout, on_deadline)
+        deadline.daemon = True
+
         # Make the request.
         try:
-            response = requests.post(url, json=payload, stream=True, timeout=120)
+            if control is not None:
+                control.check()
+                control.track(adapter.abort)
+            deadline.start()
 
-            # Initialize the result to an empty string.
-            result = ""
+            try:
+                # Time until the response headers arrive, i.e. mostly model load and queueing.
+                # The read timeout limits each wait for data; the timer above limits the total.
+                with span("request", model=model):
+                    response = session.post(
+                        url, json=payload, stream=True, timeout=(min(CONNECT_TIMEOUT, timeout), timeout)
+                    )
 
-            # Iterate over the lines of the response. The response is a stream of
-            # JSON objects, where each object contains a single line of generated
-            # code.
-            for line in response.iter_lines():
-                if line:
-                    # Decode the line from bytes to a string and parse it as JSON.
-                    data = json.loads(line.decode('utf-8'))
+                try:
+                    # Initialize the result to an empty string.
+                    result = ""
 
-                    # If the line contains a "response" key, then it contains
-                    # generated code. Append that code to the result.
-                    if "response" in data:
-                        result += data["response"]
+                    # The JSON decode time is summed over all chunks rather than traced
+                    # per chunk, which would add thousands of spans per file.
+                    with span("stream") as trace_args:
+                        chunks = 0
+                        decode_time = 0.0
+
+                        # Iterate over the lines of the response. The response is a stream of
+                        # JSON objects, where each object contains a single line of generated
+                        # code.
+                        for line in response.iter_lines():
+                            if line:
+                                # Decode the line from bytes to a string and parse it as JSON.
+                                decode_start = time.perf_counter()
+                                data = json.loads(line.decode('utf-8'))
+                                decode_time += time.perf_counter() - decode_start
+                                chunks += 1
+
+                                # If the line contains a "response" key, then it contains
+                                # generated code. Append that code to the result.
+                                if "response" in data:
+                                    result += data["response"]
+
+                        trace_args["chunks"] = chunks
+                        trace_args["decode_ms"] = round(decode_time * 1000, 3)
+                finally:
+                    response.close()
+            finally:
+                deadline.cancel()
+                if control is not None:
+                    control.untrack(adapter.abort)
+                session.close()
+
+            # The stream may also end quietly when it is aborted from another thread,
+            # so check why it stopped before handing back a truncated result.
+            if control is not None:
+                control.check()
+            if timed_out.is_set():
+                raise OllamaTimeout(f"Generation did not finish within {timeout:.0f}s")
 
             # Return the generated code.
             return result
 
-        # If any exception occurs during the request, return an empty string.
+        except (RunCancelled, OllamaTimeout):
+            raise
+
+        # If any other exception occurs during the request, work out whether it was
+        # caused by a cancel or a timeout, otherwise return an empty string.
         except Exception as e:
+            if control is not None:
+                control.check()
+            if timed_out.is_set():
+                raise OllamaTimeout(f"Generation did not finish within {timeout:.0f}s")
+            if isinstance(e, requests.exceptions.Timeout):
+                raise OllamaTimeout(f"No data received from Ollama within {timeout:.0f}s")
             return ""
+
+
+class _AbortableAdapter(HTTPAdapter):
+    def __init__(self):
+        """
+        Transport adapter whose connections can be shut down from another thread.
+
+        requests offers no way to interrupt a call that is blocked waiting for
+        response headers, so the adapter keeps track of the sockets it opens
+        and abort() shuts them down, which makes the blocked read fail
+        straight away.
+        """
+        self._lock = threading.Lock()
+        self._sockets = []
+        self._aborted = False
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _tracked_pool_class(HTTPConnectionPool, HTTPConnection, self),
+            "https": _tracked_pool_class(HTTPSConnectionPool, HTTPSConnection, self),
+        }
+
+    def register(self, connection):
+        """
+        Records the socket of a newly connected connection. If the request has
+        already been aborted while it was connecting, the socket is shut down at once.
+
+        The socket itself is kept rather than the connection: for HTTP/1.0 or
+        "Connection: close" responses http.client hands the socket over to the
+        response and sets connection.sock to None, while the body is still
+        being read from it.
+        """
+        sock = connection.sock
+        with self._lock:
+            self._sockets.append(sock)
+            aborted = self._aborted
+        if aborted:
+            _shutdown(sock)
+
+    def abort(self):
+        """
+        Shuts down every socket of this adapter, including ones still connecting.
+        """
+        with self._lock:
+            self._aborted = True
+            sockets = list(self._sockets)
+        for sock in sockets:
+            _shutdown(sock)
+
+
+def _tracked_pool_class(pool_class, connection_class, adapter):
+    # Returns a connection pool class whose connections register their socket
+    # with the adapter as soon as they are connected.
+    class TrackedConnection(connection_class):
+        def connect(self):
+            super().connect()
+            adapter.register(self)
+
+    return type(pool_class.__name__, (pool_class,), {"ConnectionCls": TrackedConnection})
+
+
+def _shutdown(sock):
+    # Shut the socket down rather than just closing it: closing does not wake
+    # up a thread that is blocked reading from it.
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        # The socket is already closed or disconnected.
+        pass
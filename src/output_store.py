@@ -0,0 +1,309 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+
+# File extension used for run databases. A single run database replaces the
+# many timestamped .cs_prompt / .cs_mod sidecar files written per source file.
+RUN_STORE_EXTENSION = ".cs_run"
+
+# Where run databases are created unless another folder is chosen. It is kept
+# outside the folder being checked so that runs do not add files to the source tree.
+DEFAULT_RUN_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "style_check_runs")
+
+# Output modes understood by check_style. "sidecar" is the original behaviour
+# of writing a .cs_prompt and .cs_mod file next to every source file, while
+# "store" writes every result of the run into one RunOutputStore database.
+OUTPUT_MODE_SIDECAR = "sidecar"
+OUTPUT_MODE_STORE = "store"
+
+
+class RunOutputStore:
+    def __init__(self, db_path):
+        """
+        Opens (or creates) the SQLite database holding the results of a run.
+
+        :param db_path: The path to the run database file.
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+
+        # The path column is the primary key, so looking up the result for a
+        # single source file is an index lookup rather than a directory scan.
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS run_info (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                path TEXT PRIMARY KEY,
+                model TEXT,
+                prompt TEXT,
+                response TEXT,
+                elapsed REAL,
+                created TEXT,
+                source_hash TEXT
+            );
+            """
+        )
+
+        # Run databases written before source hashes were recorded lack the column.
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        if "source_hash" not in columns:
+            self.connection.execute("ALTER TABLE results ADD COLUMN source_hash TEXT")
+        self.connection.commit()
+
+    @classmethod
+    def create_for_run(cls, folder_path, model, db_path=None, output_dir=None):
+        """
+        Creates a new run database, by default a timestamped file in the output folder.
+
+        :param folder_path: The folder being checked; recorded so apply() knows where the files are.
+        :param model: The name of the Ollama model used for the run.
+        :param db_path: An explicit path for the database, overriding the default location.
+        :param output_dir: The folder to create the database in when no db_path is
+            given. Defaults to DEFAULT_RUN_OUTPUT_DIR.
+        :return: A RunOutputStore for the new database.
+        """
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        if db_path is None:
+            # Name the database after the checked folder so runs of different folders can be told apart
+            output_dir = output_dir or DEFAULT_RUN_OUTPUT_DIR
+            os.makedirs(output_dir, exist_ok=True)
+            folder_name = os.path.basename(os.path.normpath(folder_path))
+            db_path = os.path.normpath(
+                os.path.join(output_dir, f"style_check_{folder_name}_{timestamp}{RUN_STORE_EXTENSION}")
+            )
+        store = cls(db_path)
+        store.set_info("folder", os.path.normpath(folder_path))
+        store.set_info("model", model)
+        store.set_info("started", timestamp)
+        return store
+
+    def set_info(self, key, value):
+        """
+        Stores a piece of metadata about the run (folder, model, start time...).
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO run_info (key, value) VALUES (?, ?)", (key, value)
+        )
+        self.connection.commit()
+
+    def get_info(self, key):
+        """
+        Returns a piece of run metadata, or None if it was never recorded.
+        """
+        row = self.connection.execute(
+            "SELECT value FROM run_info WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_result(self, path, model, prompt, response, elapsed, source_hash=None):
+        """
+        Records the prompt and model response for one source file.
+
+        :param path: The path of the source file, relative to the run folder.
+        :param model: The name of the model that produced the response.
+        :param prompt: The prompt that was sent to the model.
+        :param response: The corrected code returned by the model.
+        :param elapsed: The time in seconds the model took to respond.
+        :param source_hash: The hash_source() of the code the prompt was built from,
+            used by apply() to detect files edited since the run.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results (path, model, prompt, response, elapsed, created, source_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (_normalize_key(path), model, prompt, response, elapsed, time.strftime("%Y%m%d_%H%M%S"), source_hash)
+        )
+        self.connection.commit()
+
+    def get_result(self, path):
+        """
+        Looks up the result for a single source file.
+
+        :param path: The path of the source file, relative to the run folder.
+        :return: A dict with the stored columns, or None if the file has no result.
+        """
+        cursor = self.connection.execute(
+            "SELECT path, model, prompt, response, elapsed, created, source_hash FROM results WHERE path = ?",
+            (_normalize_key(path),)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def paths(self):
+        """
+        Returns the paths of all source files with a stored result, in sorted order.
+        """
+        return [row[0] for row in self.connection.execute("SELECT path FROM results ORDER BY path")]
+
+    def merge(self, other_db_path):
+        """
+        Copies every result from another run database into this one.
+
+        Used to combine the per-shard databases of a sharded run into a single
+        report. Results for a path already present in this store are replaced.
+
+        :param other_db_path: The path to the run database to merge in.
+        :return: The number of results merged.
+        """
+        self.connection.execute("ATTACH DATABASE ? AS other", (other_db_path,))
+        try:
+            cursor = self.connection.execute(
+                "INSERT OR REPLACE INTO results (path, model, prompt, response, elapsed, created, source_hash) "
+                "SELECT path, model, prompt, response, elapsed, created, source_hash FROM other.results"
+            )
+            merged = cursor.rowcount
+            self.connection.commit()
+        finally:
+            self.connection.execute("DETACH DATABASE other")
+        return merged
+
+    def export(self, destination):
+        """
+        Writes every stored response to a .cs_mod file under the destination folder,
+        mirroring the relative paths of the original source files.
+
+        :param destination: The folder to export the corrected files into.
+        :return: The list of files written.
+        """
+        written = []
+        for path in self.paths():
+            result = self.get_result(path)
+            target = os.path.normpath(os.path.join(destination, f"{os.path.splitext(path)[0]}.cs_mod"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as mf:
+                mf.write(result["response"])
+            written.append(target)
+        return written
+
+    def apply(self, folder_path=None, force=False):
+        """
+        Overwrites the original source files with the stored responses.
+
+        A file is only overwritten if its contents still match the source the
+        response was generated from, so edits made after the run are not lost.
+
+        :param folder_path: The folder the relative paths are resolved against.
+            Defaults to the folder recorded when the run was created.
+        :param force: Overwrite files even if they changed since the run, or if
+            the run predates source hashes and they cannot be checked.
+        :return: A tuple (written, skipped) of the files overwritten and the
+            files left alone because they changed or are missing.
+        """
+        folder_path = folder_path or self.get_info("folder")
+        written = []
+        skipped = []
+        for path in self.paths():
+            result = self.get_result(path)
+            target = os.path.normpath(os.path.join(folder_path, path))
+
+            if not os.path.isfile(target):
+                skipped.append(target)
+                continue
+
+            if not force:
+                with open(target, 'r', encoding='utf-8') as sf:
+                    current_hash = hash_source(sf.read())
+                if result["source_hash"] is None or result["source_hash"] != current_hash:
+                    skipped.append(target)
+                    continue
+
+            with open(target, 'w', encoding='utf-8') as sf:
+                sf.write(result["response"])
+            written.append(target)
+        return written, skipped
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        self.connection.close()
+
+
+def hash_source(code):
+    """
+    Returns the hash recorded for a source file, computed from its text as read
+    by the style checker (UTF-8, universal newlines).
+    """
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+
+def _normalize_key(path):
+    # Store paths with forward slashes so a run database created on Windows
+    # can be looked up on Linux and vice versa.
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def main(argv=None):
+    """
+    Command line entry point for inspecting, exporting and applying run databases.
+
+    Examples:
+        python src/output_store.py list run.cs_run
+        python src/output_store.py show run.cs_run Program.cs
+        python src/output_store.py export run.cs_run ./corrected
+        python src/output_store.py apply run.cs_run
+    """
+    parser = argparse.ArgumentParser(description="Inspect, export or apply a style check run database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List the files with a stored result.")
+    list_parser.add_argument("db_path")
+
+    show_parser = subparsers.add_parser("show", help="Print the stored response for one file.")
+    show_parser.add_argument("db_path")
+    show_parser.add_argument("path")
+
+    export_parser = subparsers.add_parser("export", help="Write the stored responses as .cs_mod files.")
+    export_parser.add_argument("db_path")
+    export_parser.add_argument("destination")
+
+    apply_parser = subparsers.add_parser("apply", help="Overwrite the source files with the stored responses.")
+    apply_parser.add_argument("db_path")
+    apply_parser.add_argument("--folder", help="Folder to apply to (defaults to the folder of the run).")
+    apply_parser.add_argument("--force", action="store_true",
+                              help="Also overwrite files that changed since the run.")
+
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.db_path):
+        print(f"Run database not found: {args.db_path}", file=sys.stderr)
+        return 1
+
+    store = RunOutputStore(args.db_path)
+    try:
+        if args.command == "list":
+            for path in store.paths():
+                print(path)
+        elif args.command == "show":
+            result = store.get_result(args.path)
+            if result is None:
+                print(f"No result stored for {args.path}", file=sys.stderr)
+                return 1
+            print(result["response"])
+        elif args.command == "export":
+            for target in store.export(args.destination):
+                print(f"Exported {target}")
+        elif args.command == "apply":
+            written, skipped = store.apply(args.folder, force=args.force)
+            for target in written:
+                print(f"Applied {target}")
+            for target in skipped:
+                print(f"Skipped {target}: changed or missing since the run (use --force to overwrite)",
+                      file=sys.stderr)
+            if skipped:
+                return 1
+    finally:
+        store.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import cProfile
+import tempfile
+import threading
+
+# Profiles and traces are written here rather than into the folder being
+# checked, so profiling a run does not add files to the source tree.
+PROFILE_OUTPUT_DIR = os.path.join(tempfile.gettempdir(), "style_check_profiles")
+
+# Holds the tracer of the run being profiled on the current worker thread.
+# Each run has its own worker thread, so overlapping runs never record into
+# each other's trace. Spans opened on a thread without a tracer cost almost
+# nothing, so the instrumentation can stay in the hot path permanently.
+_local = threading.local()
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Records timed spans from any thread and exports them in the Chrome
+        trace-event format, which can be opened in chrome://tracing or Perfetto.
+        """
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events = []
+        self._thread_names = {}
+
+    def _now(self):
+        # Trace-event timestamps are in microseconds.
+        return (time.perf_counter() - self._start) * 1e6
+
+    def add_span(self, name, start, end, args=None):
+        """
+        Records a completed span.
+
+        :param name: The stage name shown in the trace viewer.
+        :param start: The start time, as returned by _now().
+        :param end: The end time, as returned by _now().
+        :param args: Optional extra values shown when the span is selected.
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": "style_check",
+            "ph": "X",
+            "ts": start,
+            "dur": end - start,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": args or {},
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names[thread.ident] = thread.name
+
+    def span(self, name, **args):
+        """
+        Returns a context manager that records the enclosed block as a span.
+        """
+        return _Span(self, name, args)
+
+    def wrap_gui_callback(self, gui_callback):
+        """
+        Wraps a threadsafe_gui style callback so that every GUI update is traced.
+
+        Two spans are recorded on the GUI thread for each update: "gui_queue_wait"
+        for the time it sat in the Tk event queue, and "gui_update" for the time
+        it took to run.
+        """
+        def traced_gui_callback(func):
+            queued = self._now()
+            source = threading.current_thread().name
+
+            def traced_func():
+                started = self._now()
+                try:
+                    func()
+                finally:
+                    self.add_span("gui_queue_wait", queued, started, {"from": source})
+                    self.add_span("gui_update", started, self._now())
+
+            gui_callback(traced_func)
+
+        return traced_gui_callback
+
+    def export_chrome_trace(self, path):
+        """
+        Writes the recorded spans to a Chrome trace-event JSON file.
+        """
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+
+        # Metadata events give each thread a readable name in the viewer.
+        for tid, thread_name in thread_names.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": {"name": thread_name},
+            })
+
+        with open(path, 'w', encoding='utf-8') as tf:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, tf)
+
+
+class _Span:
+    # Context manager returned by Tracer.span(). The args dict is yielded so
+    # the block can attach values, e.g. byte counts, before the span ends.
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = self.tracer._now()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_span(self.name, self.start, self.tracer._now(), self.args)
+        return False
+
+
+class _NullSpan:
+    # Context manager used when profiling is off.
+    def __init__(self, args):
+        self.args = args
+
+    def __enter__(self):
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+def span(name, **args):
+    """
+    Records the enclosed block as a span of the active tracer, if profiling is on.
+
+    Usage:
+        with span("read", file=file) as args:
+            ...
+            args["bytes"] = len(code)
+    """
+    tracer = getattr(_local, "tracer", None)
+    if tracer is None:
+        return _NullSpan(args)
+    return tracer.span(name, **args)
+
+
+def run_profiled(tracer, profile_path, func, *args):
+    """
+    Runs func(*args) under cProfile with the given tracer active, then writes the
+    cProfile stats (readable with pstats or snakeviz) to profile_path.
+
+    cProfile only sees the thread it is enabled in, and the tracer is only
+    active on the calling thread, so this should be called from the worker
+    thread itself. The trace is not exported here, since GUI updates queued
+    by func may still be waiting to run.
+    """
+    previous = getattr(_local, "tracer", None)
+    _local.tracer = tracer
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func, *args)
+    finally:
+        # Restore whatever was installed before, never clear another run's tracer.
+        _local.tracer = previous
+        profiler.dump_stats(profile_path)
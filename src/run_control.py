@@ -0,0 +1,130 @@
+import threading
+
+# Per-file request deadlines scale with the size of the source file, since the
+# model has to echo back the whole corrected file. The base matches the old
+# fixed 120s timeout and also has to cover loading a cold model, so a 2 KB
+# file gets 124s and files of 240 KB or more get the maximum of 600s.
+BASE_FILE_TIMEOUT = 120.0
+TIMEOUT_PER_KB = 2.0
+MAX_FILE_TIMEOUT = 600.0
+
+
+def file_timeout(size_in_bytes):
+    """
+    Returns the deadline in seconds for generating the correction of a file.
+
+    :param size_in_bytes: The size of the source file.
+    """
+    return min(BASE_FILE_TIMEOUT + TIMEOUT_PER_KB * size_in_bytes / 1024, MAX_FILE_TIMEOUT)
+
+
+class RunCancelled(Exception):
+    """Raised inside the worker when the operator cancels the run."""
+
+
+class RunControl:
+    def __init__(self):
+        """
+        Shared state used to cancel, pause and resume a running style check.
+
+        The GUI thread calls cancel(), pause() and resume(); the worker thread
+        checks wait_if_paused() between files, and registers an abort function
+        for each open Ollama response stream so that cancel() can abort it
+        immediately instead of waiting for the generation to finish.
+        """
+        self._cancelled = threading.Event()
+
+        # Set while the run is allowed to proceed, cleared while paused.
+        self._running = threading.Event()
+        self._running.set()
+
+        # Set by the worker once the run has ended, however it ended.
+        self._finished = threading.Event()
+
+        self._lock = threading.Lock()
+        self._aborts = set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def finish(self):
+        """
+        Marks the run as ended. Called by the worker when it exits.
+        """
+        self._finished.set()
+
+        # A run paused while its last file was in flight is no longer paused.
+        self._running.set()
+
+    def cancel(self):
+        """
+        Cancels the run and aborts any response stream that is still open.
+        """
+        self._cancelled.set()
+
+        # Wake up a paused worker so it can notice the cancellation and exit.
+        self._running.set()
+
+        with self._lock:
+            aborts = list(self._aborts)
+        for abort in aborts:
+            # Aborting the stream from this thread makes the blocked read in
+            # the worker thread fail straight away.
+            abort()
+
+    def pause(self):
+        """
+        Pauses the run before the next file. The file in flight is finished first.
+        """
+        if not self.cancelled and not self.finished:
+            self._running.clear()
+
+    def resume(self):
+        """
+        Resumes a paused run.
+        """
+        self._running.set()
+
+    def wait_if_paused(self):
+        """
+        Blocks the worker while the run is paused.
+
+        :return: True if the worker should continue, False if the run was cancelled.
+        """
+        self._running.wait()
+        return not self.cancelled
+
+    def check(self):
+        """
+        Raises RunCancelled if the run has been cancelled.
+        """
+        if self.cancelled:
+            raise RunCancelled()
+
+    def track(self, abort):
+        """
+        Registers a function that aborts an open response stream, so that
+        cancel() can call it.
+        """
+        with self._lock:
+            self._aborts.add(abort)
+
+        # The run may have been cancelled just before the stream was opened.
+        if self.cancelled:
+            abort()
+
+    def untrack(self, abort):
+        """
+        Unregisters an abort function once its stream has been fully read or closed.
+        """
+        with self._lock:
+            self._aborts.discard(abort)
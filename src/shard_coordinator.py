@@ -0,0 +1,315 @@
+import os
+import sys
+import time
+import queue
+import hashlib
+import argparse
+import multiprocessing
+from ollama_client import OllamaClient
+from output_store import RunOutputStore
+from file_processing import find_source_files, read_style_guide, process_file
+
+# How long the coordinator waits for a progress event before checking whether
+# the shard worker processes are still alive.
+_POLL_INTERVAL = 0.5
+
+
+def shard_for_path(path, shard_count):
+    """
+    Returns the shard index a source file belongs to.
+
+    The index is derived from a hash of the normalized relative path, so the
+    same file always lands in the same shard regardless of which process or
+    host computes it (unlike the built-in hash(), which is salted per process).
+
+    :param path: The path of the source file, relative to the run folder.
+    :param shard_count: The total number of shards.
+    :return: An integer in the range [0, shard_count).
+    """
+    key = os.path.normpath(path).replace(os.sep, "/").encode('utf-8')
+    return int(hashlib.sha1(key).hexdigest(), 16) % shard_count
+
+
+def split_into_shards(files, shard_count):
+    """
+    Splits a list of relative file paths into shard_count lists by path hash.
+    """
+    shards = [[] for _ in range(shard_count)]
+    for file in files:
+        shards[shard_for_path(file, shard_count)].append(file)
+    return shards
+
+
+class _FixedModel:
+    # Stand-in for the Tkinter StringVar that process_file reads the model from.
+    def __init__(self, model):
+        self.model = model
+
+    def get(self):
+        return self.model
+
+
+class _ShardLog:
+    # Stand-in for the GUI text box that forwards messages to the coordinator.
+    def __init__(self, events, shard_index):
+        self.events = events
+        self.shard_index = shard_index
+
+    def insert(self, index, text):
+        self.events.put(("log", self.shard_index, text))
+
+    def see(self, index):
+        pass
+
+
+def _run_inline(func):
+    # There is no GUI thread in a shard worker, so updates run immediately.
+    func()
+
+
+def _shard_worker(shard_index, folder_path, files, model, base_url, store_path, events):
+    """
+    Entry point of a shard worker process.
+
+    Processes the given files with process_file, recording the results in the
+    shard's own run database, and reports per-file progress to the coordinator
+    through the events queue.
+    """
+    text_box = _ShardLog(events, shard_index)
+
+    style_guide = read_style_guide(_run_inline, text_box)
+    if style_guide is None:
+        events.put(("done", shard_index))
+        return
+
+    ollama = OllamaClient(base_url=base_url)
+    model_var = _FixedModel(model)
+    store = RunOutputStore.create_for_run(folder_path, model, db_path=store_path)
+    try:
+        for file in files:
+            ok = process_file(
+                file, folder_path, style_guide, ollama, model_var, text_box, _run_inline, store
+            )
+            events.put(("file", shard_index, file, ok))
+    finally:
+        store.close()
+
+    events.put(("done", shard_index))
+
+
+class ShardProgress:
+    def __init__(self, shard_index, endpoint, files):
+        """
+        Tracks the progress of a single shard.
+
+        :param shard_index: The index of the shard.
+        :param endpoint: The Ollama endpoint the shard's worker talks to.
+        :param files: The relative paths of the files assigned to the shard.
+        """
+        self.shard_index = shard_index
+        self.endpoint = endpoint
+        self.files = files
+        self.succeeded = []
+        self.failed = []
+        self.finished = False
+        self.crashed = False
+
+    @property
+    def processed(self):
+        return len(self.succeeded) + len(self.failed)
+
+    @property
+    def pending(self):
+        # Files the worker never reported on (e.g. because it crashed).
+        reported = set(self.succeeded) | set(self.failed)
+        return [f for f in self.files if f not in reported]
+
+    def __str__(self):
+        state = "crashed" if self.crashed else "done" if self.finished else "running"
+        return (
+            f"shard {self.shard_index} [{state}] {self.processed}/{len(self.files)} files "
+            f"({len(self.failed)} failed) via {self.endpoint}"
+        )
+
+
+class ShardCoordinator:
+    def __init__(self, folder_path, model, endpoints, shard_count=None, output_path=None, recursive=False):
+        """
+        Splits a style check run into shards by path hash and runs each shard
+        in its own worker process.
+
+        :param folder_path: The folder containing the C# files to check.
+        :param model: The name of the Ollama model to use.
+        :param endpoints: A list of Ollama API base URLs. Shards are assigned to
+            endpoints round-robin.
+        :param shard_count: The number of shards (worker processes). Defaults to
+            the number of endpoints.
+        :param output_path: The path of the merged run database. Defaults to a
+            timestamped .cs_run file in DEFAULT_RUN_OUTPUT_DIR.
+        :param recursive: Whether to include .cs files in subfolders. Off by default,
+            like the GUI's Check Style, so both check the same files.
+        """
+        if not endpoints:
+            raise ValueError("At least one Ollama endpoint is required.")
+        if shard_count is not None and shard_count < 1:
+            raise ValueError("The number of shards must be at least 1.")
+
+        self.folder_path = os.path.normpath(folder_path)
+        self.model = model
+        self.endpoints = list(endpoints)
+        self.shard_count = shard_count or len(self.endpoints)
+        self.output_path = output_path
+        self.recursive = recursive
+        self.progress = []
+
+    def run(self, log=print):
+        """
+        Runs all shards to completion and merges their results into one run database.
+
+        :param log: A function called with each progress and log message.
+        :return: The path of the merged run database.
+        """
+        files = find_source_files(self.folder_path, recursive=self.recursive)
+        shards = split_into_shards(files, self.shard_count)
+        log(f"Found {len(files)} C# files, split into {self.shard_count} shards.")
+
+        merged = RunOutputStore.create_for_run(self.folder_path, self.model, db_path=self.output_path)
+        self.output_path = merged.db_path
+
+        events = multiprocessing.Queue()
+        processes = {}
+        self.progress = []
+        for shard_index, shard_files in enumerate(shards):
+            endpoint = self.endpoints[shard_index % len(self.endpoints)]
+            self.progress.append(ShardProgress(shard_index, endpoint, shard_files))
+            if not shard_files:
+                self.progress[shard_index].finished = True
+                continue
+
+            process = multiprocessing.Process(
+                target=_shard_worker,
+                args=(shard_index, self.folder_path, shard_files, self.model, endpoint,
+                      self._shard_store_path(shard_index), events),
+                name=f"shard-{shard_index}",
+                daemon=True
+            )
+            process.start()
+            processes[shard_index] = process
+
+        start_time = time.time()
+        try:
+            self._collect(events, processes, log)
+        finally:
+            for process in processes.values():
+                process.join(timeout=_POLL_INTERVAL)
+                if process.is_alive():
+                    process.terminate()
+
+        # Merge the per-shard databases into the single report for the run
+        try:
+            for shard_index in processes:
+                shard_store_path = self._shard_store_path(shard_index)
+                if os.path.isfile(shard_store_path):
+                    merged.merge(shard_store_path)
+                    os.remove(shard_store_path)
+
+            failed = [f for p in self.progress for f in p.failed + p.pending]
+            merged.set_info("shards", str(self.shard_count))
+            merged.set_info("endpoints", ",".join(self.endpoints))
+            merged.set_info("failed", "\n".join(failed))
+            merged.set_info("elapsed", f"{time.time() - start_time:.2f}")
+        finally:
+            merged.close()
+
+        for shard in self.progress:
+            log(str(shard))
+        log(f"Merged results written to {self.output_path}")
+        return self.output_path
+
+    def _shard_store_path(self, shard_index):
+        return f"{self.output_path}.shard{shard_index}"
+
+    def _collect(self, events, processes, log):
+        # Consume progress events until every started shard has finished or died.
+        running = set(processes)
+        while running:
+            try:
+                event = events.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                dead = [shard_index for shard_index in running if not processes[shard_index].is_alive()]
+                if not dead:
+                    continue
+
+                # A worker may have sent "done" and exited after the get() above
+                # timed out, so read whatever is left before judging it.
+                while True:
+                    try:
+                        self._handle_event(events.get_nowait(), running, log)
+                    except queue.Empty:
+                        break
+
+                # A worker that exited without sending "done" has crashed; its
+                # remaining files are reported as pending in the final summary.
+                for shard_index in dead:
+                    if shard_index in running:
+                        self.progress[shard_index].crashed = True
+                        running.discard(shard_index)
+                        log(str(self.progress[shard_index]))
+                continue
+
+            self._handle_event(event, running, log)
+
+    def _handle_event(self, event, running, log):
+        # Apply one progress event sent by a shard worker.
+        kind, shard_index = event[0], event[1]
+        shard = self.progress[shard_index]
+        if kind == "log":
+            log(f"[shard {shard_index}] {event[2].strip()}")
+        elif kind == "file":
+            (shard.succeeded if event[3] else shard.failed).append(event[2])
+            log(str(shard))
+        elif kind == "done":
+            shard.finished = True
+            running.discard(shard_index)
+
+
+def main(argv=None):
+    """
+    Command line entry point for running a sharded style check.
+
+    Example:
+        python src/shard_coordinator.py ./repo --model llama3 \\
+            --endpoint http://host-a:11434/api --endpoint http://host-b:11434/api --shards 4
+    """
+    parser = argparse.ArgumentParser(description="Run a style check split into shards across worker processes.")
+    parser.add_argument("folder", help="Folder containing the C# files to check.")
+    parser.add_argument("--model", required=True, help="Name of the Ollama model to use.")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="Ollama API base URL; repeat to spread shards over several servers.")
+    parser.add_argument("--shards", type=int, help="Number of shards (defaults to the number of endpoints).")
+    parser.add_argument("--output", help="Path of the merged run database (defaults to a file in ~/style_check_runs).")
+    parser.add_argument("--recursive", action="store_true", help="Also check files in subfolders.")
+    args = parser.parse_args(argv)
+
+    if args.shards is not None and args.shards < 1:
+        parser.error("--shards must be at least 1")
+
+    if not os.path.isdir(args.folder):
+        print(f"Invalid folder path: {args.folder}", file=sys.stderr)
+        return 1
+
+    coordinator = ShardCoordinator(
+        args.folder,
+        args.model,
+        args.endpoints or ["http://localhost:11434/api"],
+        shard_count=args.shards,
+        output_path=args.output,
+        recursive=args.recursive
+    )
+    coordinator.run()
+
+    return 1 if any(p.failed or p.crashed for p in coordinator.progress) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
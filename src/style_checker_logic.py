@@ -3,6 +3,10 @@ import time
 import threading
 from tkinter import messagebox, END
 from ollama_client import OllamaClient
+from run_control import RunControl
+from profiling import Tracer, span, run_profiled, PROFILE_OUTPUT_DIR
+from output_store import RunOutputStore, OUTPUT_MODE_SIDECAR, OUTPUT_MODE_STORE
+from file_processing import find_source_files, read_style_guide, process_file
 
 def scan_files(folder_path, text_box):
     """
@@ -43,7 +47,7 @@ def scan_files(folder_path, text_box):
     # Move the text box to the end of the inserted text
     text_box.see(END)
 
-def check_style(folder_path, model_var, text_box, threadsafe_gui_callback):
+def check_style(folder_path, model_var, text_box, threadsafe_gui_callback, output_mode=OUTPUT_MODE_SIDECAR, profile=False, output_dir=None):
     """
     Initiates a background thread to check and correct the style of Language files.
 
@@ -51,26 +55,105 @@ def check_style(folder_path, model_var, text_box, threadsafe_gui_callback):
     :param model_var: A variable representing the selected model for style checking.
     :param text_box: The GUI text box where messages and updates will be displayed.
     :param threadsafe_gui_callback: A callback function to update the GUI in a thread-safe manner.
+    :param output_mode: OUTPUT_MODE_SIDECAR to write .cs_prompt/.cs_mod files next to each
+        source file, or OUTPUT_MODE_STORE to write all results into one run database.
+    :param profile: If True, the worker runs under cProfile and records a span trace of
+        every stage. The .prof and .trace.json files are written to PROFILE_OUTPUT_DIR
+        (style_check_profiles in the temp directory) when the run ends, not to the
+        folder being checked.
+    :param output_dir: The folder to create the run database in (store mode only).
+        Defaults to DEFAULT_RUN_OUTPUT_DIR, outside the folder being checked.
+    :return: A RunControl that can be used to cancel, pause and resume the run.
     """
 
+    # Create the control object shared between the GUI and the worker thread.
+    control = RunControl()
+
+    target = _style_check_worker
+    args = (folder_path, model_var, text_box, threadsafe_gui_callback, output_mode, control, output_dir)
+    if profile:
+        # Wrap the GUI callback here, on the GUI thread, so that the time each
+        # update waits in the Tk event queue is traced as well.
+        tracer = Tracer()
+        target = _profiled_style_check_worker
+        args = (tracer, folder_path, model_var, text_box, tracer.wrap_gui_callback(threadsafe_gui_callback), output_mode, control, output_dir)
+
     # Create a new thread to run the style checking process in the background.
     # This allows the GUI to remain responsive while the style check is being performed.
     thread = threading.Thread(
-        target=_style_check_worker,  # The function to be executed in the new thread.
-        args=(folder_path, model_var, text_box, threadsafe_gui_callback),  # Arguments to pass to the function.
+        target=_run_worker,  # The function to be executed in the new thread.
+        args=(control, target) + args,  # Arguments to pass to the function.
         daemon=True  # Set the thread as a daemon so it will close when the main program exits.
     )
 
-    # Start the execution of the thread. The _style_check_worker function will now
-    # run in the background, processing each C# file and updating the GUI accordingly.
+    # Start the execution of the thread. _run_worker now runs the worker in the background
+    # (_style_check_worker, or _profiled_style_check_worker when profiling), processing each
+    # C# file and updating the GUI accordingly, and marks the run as finished when it exits.
     thread.start()
 
-def _style_check_worker(folder_path, model_var, text_box, gui_callback):
+    return control
+
+def _run_worker(control, target, *args):
+    """
+    Runs the worker function and marks the run as finished however it ends, so the
+    GUI can tell a finished run from one that is still in progress.
+    """
+    try:
+        target(*args)
+    finally:
+        control.finish()
+
+def _profiled_style_check_worker(tracer, folder_path, model_var, text_box, gui_callback, output_mode, control, output_dir=None):
+    """
+    Runs _style_check_worker under cProfile with span tracing enabled, then writes
+    the profile and the Chrome trace to PROFILE_OUTPUT_DIR.
+    """
+
+    # Without a valid folder there is nothing to profile; let the worker report the problem
+    if not folder_path or not os.path.isdir(folder_path):
+        _style_check_worker(folder_path, model_var, text_box, gui_callback, output_mode, control, output_dir)
+        return
+
+    # Name the files after the checked folder so profiles of different folders can be told apart
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    folder_name = os.path.basename(os.path.normpath(folder_path))
+    output_prefix = os.path.join(PROFILE_OUTPUT_DIR, f"style_check_{folder_name}_{timestamp}")
+    profile_path = f"{output_prefix}.prof"
+    trace_path = f"{output_prefix}.trace.json"
+
+    try:
+        os.makedirs(PROFILE_OUTPUT_DIR, exist_ok=True)
+        run_profiled(
+            tracer, profile_path, _style_check_worker,
+            folder_path, model_var, text_box, gui_callback, output_mode, control, output_dir
+        )
+    finally:
+        # Export the trace from the GUI thread. GUI updates run in the order they were
+        # queued, so by then every update from the run has been traced. This also runs
+        # if profiling failed, so whatever was recorded is not lost.
+        def export_trace():
+            try:
+                tracer.export_chrome_trace(trace_path)
+                message = f"Profile written to: {profile_path}\nTrace written to: {trace_path}\n"
+            except Exception as e:
+                message = f"Error writing trace: {e}\n"
+            text_box.insert(END, message)
+            text_box.see(END)
+
+        gui_callback(export_trace)
+
+def _style_check_worker(folder_path, model_var, text_box, gui_callback, output_mode=OUTPUT_MODE_SIDECAR, control=None, output_dir=None):
     """
     Worker thread that processes each C# file using the selected LLM model and style guide.
     This function is executed in a separate thread to avoid blocking the main program.
+
+    The optional RunControl is checked before each file, so a paused run waits there
+    and a cancelled run stops without starting any further requests.
     """
 
+    if control is None:
+        control = RunControl()
+
     # Check if the folder path is valid
     if not folder_path:
         # If the folder path is invalid, show a warning message
@@ -82,13 +165,16 @@ def _style_check_worker(folder_path, model_var, text_box, gui_callback):
         return
 
     # Read the C# style guide from the predefined location
-    style_guide = _read_style_guide(gui_callback, text_box)
+    with span("read_style_guide"):
+        style_guide = read_style_guide(gui_callback, text_box)
     if style_guide is None:
         # If there was an error reading the style guide, don't continue
         return
 
     # Get a list of .cs files in the folder path
-    cs_files = [f for f in os.listdir(folder_path) if f.endswith('.cs')]
+    with span("discover") as trace_args:
+        cs_files = find_source_files(folder_path)
+        trace_args["files"] = len(cs_files)
 
     # Check if any .cs files were found
     if not cs_files:
@@ -103,16 +189,41 @@ def _style_check_worker(folder_path, model_var, text_box, gui_callback):
     # Create a client to interact with the LLM
     ollama = OllamaClient()
 
+    # In store mode all results of the run go into a single database instead of
+    # one .cs_prompt and one .cs_mod file per source file. The database is opened
+    # here so the SQLite connection belongs to this worker thread.
+    store = None
+    if output_mode == OUTPUT_MODE_STORE:
+        try:
+            store = RunOutputStore.create_for_run(folder_path, model_var.get(), output_dir=output_dir)
+        except Exception as e:
+            # E.g. the folder is read-only or SQLite cannot open the file. Report
+            # it in the GUI rather than letting the worker thread die silently.
+            message = f"Error creating run database: {e}\n"
+            gui_callback(lambda: text_box.insert(END, message))
+            return
+        gui_callback(lambda: text_box.insert(END, f"Writing results to run database: {store.db_path}\n"))
+
     # Process each .cs file found
-    for file in cs_files:
-        _process_file(
-            file, folder_path, style_guide, ollama, model_var, text_box, gui_callback
-        )
+    try:
+        for file in cs_files:
+            # Wait here while the run is paused, and stop once it is cancelled
+            with span("pause_wait"):
+                if not control.wait_if_paused():
+                    break
+            with span("file", file=file):
+                process_file(
+                    file, folder_path, style_guide, ollama, model_var, text_box, gui_callback, store, control
+                )
+    finally:
+        if store is not None:
+            store.close()
 
     # Insert a message into the text box to indicate that all files have been processed
+    summary = "\nRun cancelled.\n" if control.cancelled else "\nAll files processed.\n"
     gui_callback(
         lambda: text_box.insert(
-            END, "\nAll files processed.\n"
+            END, summary
         )
     )
 
@@ -120,94 +231,3 @@ def _style_check_worker(folder_path, model_var, text_box, gui_callback):
     gui_callback(
         lambda: text_box.see(END)
     )
-
-def _read_style_guide(gui_callback, text_box):
-    """
-    Reads the C# style guide from the predefined location.
-
-    :param gui_callback: A function to safely update the GUI from a different thread.
-    :param text_box: The GUI text box widget where messages and errors will be displayed.
-    :return: The contents of the style guide file as a string, or None if an error occurs.
-    """
-    
-    # Construct the path to the style guide file by combining the directory of this script
-    # with the relative path to the style guide file. This ensures that the path is correct
-    # regardless of the environment in which the script is run.
-    style_guide_path = os.path.normpath(
-        os.path.join(os.path.dirname(__file__), '..', 'style_guides', 'google_csharp_style_guide.txt')
-    )
-
-    try:
-        # Attempt to open the style guide file in read mode.
-        with open(style_guide_path, 'r') as sg_file:
-            # Read the entire contents of the file and return it as a string.
-            return sg_file.read()
-    except Exception as e:
-        # If an error occurs while opening or reading the file, update the GUI text box
-        # with the error message. The gui_callback function ensures that this update is
-        # performed safely from the GUI thread, avoiding any concurrency issues.
-        gui_callback(lambda: text_box.insert(END, f"Error reading style guide: {e}\n"))
-        
-        # Return None to indicate that an error occurred and the style guide could not be read.
-        return None
-
-def _process_file(file, folder_path, style_guide, ollama, model_var, text_box, _threadsafe_gui):
-    """
-    This function is responsible for processing a single source code file using the selected Ollama model and the given style guide.
-    It takes the following parameters:
-        - file: The relative path to the source code file to process.
-        - folder_path: The absolute path to the folder containing the source code file.
-        - style_guide: The contents of the style guide file as a string.
-        - ollama: An OllamaClient object which is used to send requests to the Ollama server.
-        - model_var: A Tkinter StringVar object which contains the name of the currently selected Ollama model.
-        - text_box: The GUI text box widget where messages and errors will be displayed.
-        - _threadsafe_gui: A function to safely update the GUI from a different thread.
-
-    The function writes the style guide and the source code to a .prompt file, sends the prompt to the Ollama server using the selected model,
-    and writes the response to a .cs_mod file in the same directory as the source code file.
-    """
-
-    file_path = os.path.normpath(os.path.join(folder_path, file))
-    selected_model = model_var.get()
-    _threadsafe_gui(lambda: text_box.insert(END, f"Processing {file} with model '{selected_model}'...\n"))
-
-    try:
-        # Read the source code file
-        with open(file_path, 'r', encoding='utf-8') as cf:
-            code = cf.read()
-
-        # Construct the prompt to send to the Ollama server
-        prompt = (
-            f"Check and rewrite the following C# code according to this style guide.\n"
-            f"Style Guide:\n{style_guide}\n\n"
-            f"Code:\n{code}\n\n"
-            f"Return only the corrected code."
-        )
-
-        # Write the prompt to a .prompt file
-        timestamp = time.strftime("%Y%m%d_%H%M%S")
-        prompt_file = os.path.normpath(os.path.join(folder_path, f"{os.path.splitext(file)[0]}_{timestamp}.cs_prompt"))
-        _threadsafe_gui(lambda: text_box.insert(END, f"\n Creating Prompt file: {prompt_file} \n"))
-        with open(prompt_file, 'w', encoding='utf-8') as pf:
-            pf.write(prompt)
-
-        # Send the prompt to the Ollama server and get the response
-        start_time = time.time()
-        response = ollama.send_request(prompt, model=selected_model)
-        elapsed = time.time() - start_time
-
-        if response:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            mod_file = os.path.normpath(os.path.join(folder_path, f"{os.path.splitext(file)[0]}_{timestamp}.cs_mod"))
-
-            # Write the response from the Ollama server to a .cs_mod file
-            with open(mod_file, 'w', encoding='utf-8') as mf:
-                mf.write(response)
-
-            _threadsafe_gui(lambda: text_box.insert(END, f"Processed {file} -> {mod_file} (in {elapsed:.2f}s)\n"))
-        else:
-            _threadsafe_gui(lambda: text_box.insert(END, f"No response from model for {file}.\n"))
-
-    except Exception as e:
-        _threadsafe_gui(lambda: text_box.insert(END, f"Error processing {file}: {e}\n"))
-
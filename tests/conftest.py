@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The application modules live flat in src/ and import each other by bare
+# name (the app is started with `python src/main.py`), so put src/ on the path.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,87 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllama:
+    def __init__(self, header_delay=0.0, chunk_delay=0.0, chunks=None, close_style=False):
+        """
+        A fake Ollama /api/generate endpoint on loopback, for tests.
+
+        By default it streams back the code found in the prompt, prefixed by a
+        comment naming the server port, as newline-delimited JSON.
+
+        :param header_delay: Seconds to wait before sending the response headers,
+            like Ollama does while it is queueing a request or loading a model.
+        :param chunk_delay: Seconds to wait before each streamed chunk.
+        :param chunks: A fixed list of response strings to stream instead of the code.
+        :param close_style: Answer with an HTTP/1.0 response that ends when the
+            connection closes, instead of a keep-alive chunked HTTP/1.1 response.
+        """
+        self.header_delay = header_delay
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.close_style = close_style
+        self.requests = []
+        self.request_received = threading.Event()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0" if close_style else "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.requests.append(body)
+                fake.request_received.set()
+                try:
+                    fake._respond(self, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client aborted the request.
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}/api"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _respond(self, handler, body):
+        time.sleep(self.header_delay)
+        if self.chunks is not None:
+            parts = self.chunks
+        else:
+            code = body["prompt"].split("Code:\n", 1)[1].rsplit("\n\nReturn only", 1)[0]
+            parts = [f"// port {self.port}\n", code]
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        if not self.close_style:
+            handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        handler.wfile.flush()
+
+        for part in parts:
+            time.sleep(self.chunk_delay)
+            data = (json.dumps({"response": part}) + "\n").encode('utf-8')
+            if self.close_style:
+                handler.wfile.write(data)
+            else:
+                handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+
+        if not self.close_style:
+            handler.wfile.write(b"0\r\n\r\n")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,90 @@
+import time
+import threading
+import pytest
+from fake_ollama import FakeOllama
+from ollama_client import OllamaClient, OllamaTimeout
+from run_control import RunControl, RunCancelled
+
+# Each scenario runs against a keep-alive chunked HTTP/1.1 server and against an
+# HTTP/1.0 server that ends the body by closing the connection. With the latter,
+# http.client hands the socket over to the response, which the abort has to handle.
+SERVER_STYLES = pytest.mark.parametrize("close_style", [False, True], ids=["keep-alive", "close"])
+
+# How late an abort may be, allowing for a slow test machine.
+SLACK = 1.5
+
+
+def _cancel_after(control, delay):
+    timer = threading.Timer(delay, control.cancel)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+@SERVER_STYLES
+def test_complete_response(close_style):
+    with FakeOllama(chunks=["class A ", "{ }"], close_style=close_style) as server:
+        client = OllamaClient(base_url=server.base_url)
+        assert client.send_request("prompt", "test-model", timeout=10, control=RunControl()) == "class A { }"
+        assert server.requests[0]["model"] == "test-model"
+
+
+@SERVER_STYLES
+def test_cancel_before_headers(close_style):
+    with FakeOllama(header_delay=30, chunks=["x"], close_style=close_style) as server:
+        client = OllamaClient(base_url=server.base_url)
+        control = RunControl()
+        _cancel_after(control, 0.5)
+
+        start = time.monotonic()
+        with pytest.raises(RunCancelled):
+            client.send_request("prompt", "test-model", control=control)
+        assert time.monotonic() - start < 0.5 + SLACK
+
+
+@SERVER_STYLES
+def test_cancel_mid_stream(close_style):
+    with FakeOllama(chunk_delay=0.2, chunks=["x"] * 100, close_style=close_style) as server:
+        client = OllamaClient(base_url=server.base_url)
+        control = RunControl()
+        _cancel_after(control, 1.0)
+
+        start = time.monotonic()
+        with pytest.raises(RunCancelled):
+            client.send_request("prompt", "test-model", control=control)
+        assert time.monotonic() - start < 1.0 + SLACK
+
+
+def test_cancelled_run_sends_no_request():
+    with FakeOllama(chunks=["x"]) as server:
+        client = OllamaClient(base_url=server.base_url)
+        control = RunControl()
+        control.cancel()
+
+        with pytest.raises(RunCancelled):
+            client.send_request("prompt", "test-model", control=control)
+        assert server.requests == []
+
+
+@SERVER_STYLES
+def test_deadline_before_headers(close_style):
+    with FakeOllama(header_delay=30, chunks=["x"], close_style=close_style) as server:
+        client = OllamaClient(base_url=server.base_url)
+
+        start = time.monotonic()
+        with pytest.raises(OllamaTimeout):
+            client.send_request("prompt", "test-model", timeout=1)
+        assert time.monotonic() - start < 1 + SLACK
+
+
+@SERVER_STYLES
+def test_deadline_mid_stream(close_style):
+    # Data keeps arriving well within the read timeout, so only the overall
+    # deadline can stop this generation.
+    with FakeOllama(chunk_delay=0.2, chunks=["x"] * 100, close_style=close_style) as server:
+        client = OllamaClient(base_url=server.base_url)
+
+        start = time.monotonic()
+        with pytest.raises(OllamaTimeout, match="did not finish"):
+            client.send_request("prompt", "test-model", timeout=1.5)
+        assert time.monotonic() - start < 1.5 + SLACK
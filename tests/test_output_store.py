@@ -0,0 +1,179 @@
+import os
+import sqlite3
+
+from output_store import RunOutputStore, hash_source, _normalize_key
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _store_with_results(tmp_path, folder, sources):
+    # Creates a run database holding an upper-cased "correction" of each source.
+    store = RunOutputStore.create_for_run(str(folder), "model", db_path=str(tmp_path / "run.cs_run"))
+    for path, code in sources.items():
+        store.add_result(path, "model", f"prompt for {path}", code.upper(), 1.5, hash_source(code))
+    return store
+
+
+def test_normalize_key_uses_forward_slashes():
+    assert _normalize_key(os.path.join("sub", "dir", "A.cs")) == "sub/dir/A.cs"
+    assert _normalize_key("sub/./dir/../A.cs") == "sub/A.cs"
+
+
+def test_add_and_get_result_round_trip(tmp_path):
+    store = RunOutputStore(str(tmp_path / "run.cs_run"))
+    store.add_result(os.path.join("sub", "A.cs"), "llama3", "the prompt", "the response", 2.5, "abc")
+
+    for key in ("sub/A.cs", os.path.join("sub", "A.cs")):
+        result = store.get_result(key)
+        assert result["path"] == "sub/A.cs"
+        assert result["model"] == "llama3"
+        assert result["prompt"] == "the prompt"
+        assert result["response"] == "the response"
+        assert result["elapsed"] == 2.5
+        assert result["source_hash"] == "abc"
+
+    assert store.get_result("missing.cs") is None
+    assert store.paths() == ["sub/A.cs"]
+    store.close()
+
+
+def test_run_info_and_reopen(tmp_path):
+    db_path = str(tmp_path / "run.cs_run")
+    store = RunOutputStore.create_for_run(str(tmp_path), "llama3", db_path=db_path)
+    store.add_result("A.cs", "llama3", "p", "r", 1.0)
+    store.close()
+
+    store = RunOutputStore(db_path)
+    assert store.get_info("model") == "llama3"
+    assert store.get_info("folder") == os.path.normpath(str(tmp_path))
+    assert store.paths() == ["A.cs"]
+    store.close()
+
+
+def test_opening_old_database_adds_source_hash_column(tmp_path):
+    db_path = str(tmp_path / "old.cs_run")
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE results (path TEXT PRIMARY KEY, model TEXT, prompt TEXT, "
+        "response TEXT, elapsed REAL, created TEXT)"
+    )
+    connection.execute("INSERT INTO results VALUES ('A.cs', 'm', 'p', 'r', 1.0, 'now')")
+    connection.commit()
+    connection.close()
+
+    store = RunOutputStore(db_path)
+    assert store.get_result("A.cs")["source_hash"] is None
+    store.close()
+
+
+def test_merge_combines_results(tmp_path):
+    first = RunOutputStore(str(tmp_path / "first.cs_run"))
+    first.add_result("A.cs", "m", "p", "a", 1.0, "ha")
+    first.add_result("sub/B.cs", "m", "p", "b-old", 1.0, "hb")
+    second = RunOutputStore(str(tmp_path / "second.cs_run"))
+    second.add_result("sub/B.cs", "m", "p", "b-new", 1.0, "hb2")
+    second.add_result("C.cs", "m", "p", "c", 1.0, "hc")
+    second.close()
+
+    assert first.merge(str(tmp_path / "second.cs_run")) == 2
+    assert first.paths() == ["A.cs", "C.cs", "sub/B.cs"]
+    assert first.get_result("sub/B.cs")["response"] == "b-new"
+    assert first.get_result("sub/B.cs")["source_hash"] == "hb2"
+    first.close()
+
+
+def test_export_mirrors_relative_paths(tmp_path):
+    store = _store_with_results(tmp_path, tmp_path / "src", {"A.cs": "a", "sub/B.cs": "b"})
+
+    written = store.export(str(tmp_path / "out"))
+
+    assert sorted(written) == sorted([
+        os.path.normpath(str(tmp_path / "out" / "A.cs_mod")),
+        os.path.normpath(str(tmp_path / "out" / "sub" / "B.cs_mod")),
+    ])
+    assert _read(str(tmp_path / "out" / "sub" / "B.cs_mod")) == "B"
+    store.close()
+
+
+def test_apply_overwrites_unchanged_files(tmp_path):
+    folder = tmp_path / "src"
+    _write(str(folder / "A.cs"), "a")
+    _write(str(folder / "sub" / "B.cs"), "b")
+    store = _store_with_results(tmp_path, folder, {"A.cs": "a", "sub/B.cs": "b"})
+
+    written, skipped = store.apply()
+
+    assert len(written) == 2 and skipped == []
+    assert _read(str(folder / "A.cs")) == "A"
+    assert _read(str(folder / "sub" / "B.cs")) == "B"
+    store.close()
+
+
+def test_apply_skips_files_changed_since_the_run(tmp_path):
+    folder = tmp_path / "src"
+    _write(str(folder / "A.cs"), "a")
+    _write(str(folder / "B.cs"), "b")
+    store = _store_with_results(tmp_path, folder, {"A.cs": "a", "B.cs": "b", "Gone.cs": "g"})
+
+    # Edited after the run; the edit must survive.
+    _write(str(folder / "B.cs"), "b edited")
+
+    written, skipped = store.apply()
+
+    assert written == [os.path.normpath(str(folder / "A.cs"))]
+    assert sorted(skipped) == sorted([
+        os.path.normpath(str(folder / "B.cs")),
+        os.path.normpath(str(folder / "Gone.cs")),
+    ])
+    assert _read(str(folder / "B.cs")) == "b edited"
+
+    # Applying again is a no-op, as A.cs now holds the response.
+    written, _ = store.apply()
+    assert written == []
+    store.close()
+
+
+def test_apply_without_source_hash_needs_force(tmp_path):
+    folder = tmp_path / "src"
+    _write(str(folder / "A.cs"), "a")
+    store = RunOutputStore.create_for_run(str(folder), "m", db_path=str(tmp_path / "run.cs_run"))
+    store.add_result("A.cs", "m", "p", "A", 1.0)
+
+    assert store.apply() == ([], [os.path.normpath(str(folder / "A.cs"))])
+    assert _read(str(folder / "A.cs")) == "a"
+
+    written, skipped = store.apply(force=True)
+    assert written == [os.path.normpath(str(folder / "A.cs"))] and skipped == []
+    assert _read(str(folder / "A.cs")) == "A"
+    store.close()
+
+
+def test_create_for_run_defaults_outside_the_checked_folder(tmp_path, monkeypatch):
+    import output_store
+    output_dir = tmp_path / "runs"
+    monkeypatch.setattr(output_store, "DEFAULT_RUN_OUTPUT_DIR", str(output_dir))
+    folder = tmp_path / "project"
+    folder.mkdir()
+
+    store = RunOutputStore.create_for_run(str(folder), "m")
+    store.close()
+
+    assert os.path.dirname(store.db_path) == os.path.normpath(str(output_dir))
+    assert os.path.basename(store.db_path).startswith("style_check_project_")
+    assert os.listdir(str(folder)) == []
+
+
+def test_create_for_run_in_chosen_output_dir(tmp_path):
+    store = RunOutputStore.create_for_run(str(tmp_path / "project"), "m", output_dir=str(tmp_path / "chosen"))
+    store.close()
+
+    assert os.path.dirname(store.db_path) == os.path.normpath(str(tmp_path / "chosen"))
@@ -0,0 +1,76 @@
+import threading
+import pytest
+from run_control import RunControl, RunCancelled, file_timeout, BASE_FILE_TIMEOUT, MAX_FILE_TIMEOUT
+
+
+def test_file_timeout_scales_with_size():
+    assert file_timeout(0) == BASE_FILE_TIMEOUT
+    assert file_timeout(2048) == BASE_FILE_TIMEOUT + 4
+    assert file_timeout(10 * 1024 * 1024) == MAX_FILE_TIMEOUT
+
+
+def test_cancel_wakes_paused_worker():
+    control = RunControl()
+    control.pause()
+    assert control.paused
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(control.wait_if_paused()))
+    worker.start()
+    worker.join(timeout=0.2)
+    assert worker.is_alive()
+
+    control.cancel()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert results == [False]
+    assert not control.paused
+
+
+def test_resume_wakes_paused_worker():
+    control = RunControl()
+    control.pause()
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(control.wait_if_paused()))
+    worker.start()
+    control.resume()
+    worker.join(timeout=5)
+    assert results == [True]
+
+
+def test_pause_is_ignored_after_finish_or_cancel():
+    finished = RunControl()
+    finished.finish()
+    finished.pause()
+    assert finished.finished and not finished.paused
+
+    cancelled = RunControl()
+    cancelled.cancel()
+    cancelled.pause()
+    assert not cancelled.paused
+
+
+def test_finish_releases_pause():
+    control = RunControl()
+    control.pause()
+    control.finish()
+    assert not control.paused
+
+
+def test_cancel_calls_tracked_aborts():
+    control = RunControl()
+    calls = []
+    control.track(lambda: calls.append("first"))
+    second = lambda: calls.append("second")
+    control.track(second)
+    control.untrack(second)
+
+    control.cancel()
+    assert calls == ["first"]
+    with pytest.raises(RunCancelled):
+        control.check()
+
+    # Streams opened after the cancel are aborted as soon as they are tracked.
+    control.track(lambda: calls.append("late"))
+    assert calls == ["first", "late"]
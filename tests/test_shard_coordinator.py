@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+import subprocess
+import multiprocessing
+from fake_ollama import FakeOllama
+from output_store import RunOutputStore
+from shard_coordinator import ShardCoordinator, shard_for_path, split_into_shards
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+
+FILES = [f"File{i}.cs" for i in range(12)]
+
+
+def _make_folder(tmp_path):
+    folder = tmp_path / "repo"
+    folder.mkdir()
+    for name in FILES:
+        (folder / name).write_text(f"class {name[:-3]} {{ }}\n", encoding="utf-8")
+    return folder
+
+
+def test_files_are_spread_over_both_shards():
+    # The tests below rely on both shards getting some of FILES.
+    assert all(split_into_shards(FILES, 2))
+
+
+def test_shard_for_path_is_stable_across_processes():
+    paths = FILES + ["sub/Nested.cs", os.path.join("sub", "Other.cs")]
+    expected = [shard_for_path(p, 5) for p in paths]
+    assert all(0 <= index < 5 for index in expected)
+
+    # A fresh interpreter with a different hash seed computes the same shards.
+    script = (
+        f"import sys; sys.path.insert(0, {SRC_DIR!r});"
+        "from shard_coordinator import shard_for_path;"
+        f"print([shard_for_path(p, 5) for p in {paths!r}])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=dict(os.environ, PYTHONHASHSEED="123"),
+        capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == str(expected)
+
+    # Separators are normalized, so Windows and POSIX paths agree.
+    assert shard_for_path("sub/Nested.cs", 5) == shard_for_path(os.path.join("sub", "Nested.cs"), 5)
+
+
+def test_run_merges_every_file_once(tmp_path):
+    folder = _make_folder(tmp_path)
+    output_path = str(tmp_path / "merged.cs_run")
+    messages = []
+
+    with FakeOllama() as first, FakeOllama() as second:
+        coordinator = ShardCoordinator(
+            str(folder), "test-model", [first.base_url, second.base_url], output_path=output_path
+        )
+        assert coordinator.run(log=messages.append) == output_path
+
+        # Each shard talked to its own endpoint.
+        assert len(first.requests) + len(second.requests) == len(FILES)
+        assert first.requests and second.requests
+
+    assert all(p.finished and not p.crashed and not p.failed for p in coordinator.progress)
+    assert sorted(os.listdir(tmp_path)) == ["merged.cs_run", "repo"]
+
+    store = RunOutputStore(output_path)
+    try:
+        assert store.paths() == sorted(FILES)
+        assert store.get_info("shards") == "2"
+        assert store.get_info("failed") == ""
+        for shard in coordinator.progress:
+            port = (first if shard.shard_index == 0 else second).port
+            for name in shard.files:
+                assert store.get_result(name)["response"].startswith(f"// port {port}\n")
+    finally:
+        store.close()
+
+
+def test_killed_worker_is_reported_as_crashed(tmp_path):
+    folder = _make_folder(tmp_path)
+    output_path = str(tmp_path / "merged.cs_run")
+    shards = split_into_shards(FILES, 2)
+
+    # The second endpoint never answers, so shard 1 is stuck on its first file.
+    with FakeOllama() as healthy, FakeOllama(header_delay=60) as stalled:
+        coordinator = ShardCoordinator(
+            str(folder), "test-model", [healthy.base_url, stalled.base_url], output_path=output_path
+        )
+        runner = threading.Thread(target=coordinator.run, kwargs={"log": lambda message: None})
+        runner.start()
+
+        assert stalled.request_received.wait(timeout=10)
+        worker = next(p for p in multiprocessing.active_children() if p.name == "shard-1")
+        worker.kill()
+
+        runner.join(timeout=30)
+        assert not runner.is_alive()
+
+    crashed = coordinator.progress[1]
+    assert crashed.crashed and not crashed.finished
+    assert crashed.pending == shards[1]
+    assert coordinator.progress[0].finished and not coordinator.progress[0].crashed
+    assert not os.path.exists(f"{output_path}.shard0")
+    assert not os.path.exists(f"{output_path}.shard1")
+
+    store = RunOutputStore(output_path)
+    try:
+        assert store.paths() == sorted(shards[0])
+        assert store.get_info("failed").split("\n") == shards[1]
+    finally:
+        store.close()